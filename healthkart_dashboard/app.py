@@ -1,6 +1,9 @@
+import os
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import altair as alt
 
 st.set_page_config(page_title="HealthKart Influencer Dashboard", layout="wide")
 st.markdown("## HealthKart Influencer Campaign Performance Tracker")
@@ -9,19 +12,93 @@ st.markdown("Track ROI, analyze influencer performance, and get actionable insig
 # ===========================
 # 🔽 Load & Clean Data Early
 # ===========================
+DATA_DIR = "data"
+
+# Low-cardinality text columns stored as categoricals (smaller, faster isin/groupby)
+CATEGORICAL_COLUMNS = ['platform', 'campaign', 'category', 'gender', 'product']
+# Candidate post date columns, in order of preference, and their expected format
+DATE_COLUMNS = ['date', 'post_date', 'campaign_date', 'created_at']
+DATE_FORMAT = '%Y-%m-%d'
+# Influencer attributes joined onto posts/ROAS rows by influencer id
+INFLUENCER_LOOKUP_COLUMNS = ['name', 'platform', 'category', 'gender', 'follower count', 'follower_count', 'followers']
+# Free-text columns stored as Arrow-backed strings (contiguous buffers, C-level hashing)
+STRING_COLUMNS = ['name', 'url', 'caption']
+# Numeric columns downcast to the smallest dtype that holds them
+NUMERIC_COLUMNS = ['follower count', 'follower_count', 'followers', 'revenue', 'orders',
+                   'total_payout', 'payout_amount', 'rate']
+
+
+def read_csv_cached(name):
+    """Read data/<name>.csv, keeping a Feather copy that is reused while newer than the CSV."""
+    csv_path = os.path.join(DATA_DIR, f"{name}.csv")
+    feather_path = os.path.join(DATA_DIR, f"{name}.feather")
+
+    if os.path.exists(feather_path) and os.path.getmtime(feather_path) >= os.path.getmtime(csv_path):
+        try:
+            return pd.read_feather(feather_path)
+        except Exception:
+            pass  # Unreadable cache; rebuild it from the CSV below
+
+    df = pd.read_csv(csv_path)
+    # Write to a temp file and swap it in, so an interrupted write never leaves a truncated cache
+    tmp_path = os.path.join(DATA_DIR, f"{name}.{os.getpid()}.tmp.feather")
+    try:
+        df.to_feather(tmp_path)
+        os.replace(tmp_path, feather_path)
+    except Exception:
+        # Cache is best-effort; fall back to the CSV next run
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return df
+
+
+def parse_dates(values):
+    """Parse a date column with DATE_FORMAT, falling back to inference if nothing matches."""
+    parsed = pd.to_datetime(values, format=DATE_FORMAT, cache=True, errors='coerce')
+    if parsed.isna().all() and values.notna().any():
+        parsed = pd.to_datetime(values, cache=True, errors='coerce')
+    return parsed
+
+
 @st.cache_data
 def load_and_clean_data():
     try:
-        influencers = pd.read_csv("data/influencers.csv")
-        posts = pd.read_csv("data/posts.csv")
-        tracking = pd.read_csv("data/tracking_data.csv")
-        payouts = pd.read_csv("data/payouts.csv")
+        influencers = read_csv_cached("influencers")
+        posts = read_csv_cached("posts")
+        tracking = read_csv_cached("tracking_data")
+        payouts = read_csv_cached("payouts")
 
         # Standardize column names: strip whitespace and lowercase
         for df in [influencers, posts, tracking, payouts]:
             df.columns = df.columns.str.strip().str.lower()
 
-        return influencers, posts, tracking, payouts
+            # Compact dtypes
+            for col in CATEGORICAL_COLUMNS:
+                if col in df.columns:
+                    df[col] = df[col].astype("category")
+            for col in STRING_COLUMNS:
+                if col in df.columns:
+                    df[col] = df[col].astype("string[pyarrow]")
+            for col in NUMERIC_COLUMNS:
+                if col in df.columns:
+                    df[col] = pd.to_numeric(df[col], errors='coerce', downcast='integer')
+
+        for col in DATE_COLUMNS:
+            if col in posts.columns:
+                posts[col] = parse_dates(posts[col])
+
+        # Index payouts by influencer so per-filter selection is an index lookup.
+        # The index is left unnamed so merges on the 'influencer_id' column stay unambiguous.
+        if 'influencer_id' in payouts.columns:
+            payouts = payouts.set_index('influencer_id', drop=False).rename_axis(None).sort_index(kind='stable')
+
+        # Denormalized id -> attributes lookup, shared by every influencer join
+        inf_lookup = None
+        if 'id' in influencers.columns:
+            lookup_cols = [col for col in INFLUENCER_LOOKUP_COLUMNS if col in influencers.columns]
+            inf_lookup = influencers.set_index('id')[lookup_cols]
+
+        return influencers, posts, tracking, payouts, inf_lookup
     except FileNotFoundError as e:
         st.error(f"File not found: {e}")
         st.stop()
@@ -29,8 +106,226 @@ def load_and_clean_data():
         st.error(f"Error loading data: {e}")
         st.stop()
 
+
+# ===========================
+# 🧮 Cached Computations
+# ===========================
+# Each stage is keyed on the (sorted, hashable) filter selections, so reruns
+# triggered by unrelated widgets are served straight from the cache.
+
+def to_key(selection):
+    """Turn a multiselect result into a hashable, order-independent cache key."""
+    # key=str so mixed values (e.g. a NaN option among strings) still sort
+    return tuple(sorted(selection, key=str)) if selection is not None else None
+
+
+def selection_mask(values, selection):
+    """isin mask for a multiselect; selecting every option also keeps missing values."""
+    # Options come from .cat.categories, which never lists NaN, so the default
+    # "everything selected" state must not drop rows with a missing value.
+    selected = set(selection)  # Sets give O(1) membership probes in isin
+    mask = values.isin(selected)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        options = values.cat.categories
+    else:
+        options = values.dropna().unique()
+    if selected.issuperset(options):
+        mask |= values.isna()
+    return mask
+
+
+@st.cache_data(max_entries=32)
+def apply_filters(platforms, campaigns, products, categories, genders, follower_range, follower_col):
+    """Return (filtered_influencers, filtered_tracking) for one filter state."""
+    influencers, _, tracking, _, _ = load_and_clean_data()
+
+    # Start with base data
+    filtered_influencers = influencers[selection_mask(influencers["platform"], platforms)]
+    filtered_tracking = tracking[selection_mask(tracking["campaign"], campaigns)]
+
+    if products:
+        filtered_tracking = filtered_tracking[selection_mask(filtered_tracking["product"], products)]
+    if categories:
+        filtered_influencers = filtered_influencers[selection_mask(filtered_influencers["category"], categories)]
+    if follower_range and follower_col:
+        filtered_influencers = filtered_influencers[
+            (filtered_influencers[follower_col] >= follower_range[0]) &
+            (filtered_influencers[follower_col] <= follower_range[1])
+            ]
+    if genders:
+        filtered_influencers = filtered_influencers[selection_mask(filtered_influencers["gender"], genders)]
+
+    return filtered_influencers, filtered_tracking
+
+
+@st.cache_data
+def pre_aggregate_tracking():
+    """Tracking totals per (influencer, campaign, product), computed once per data load."""
+    _, _, tracking, _, _ = load_and_clean_data()
+    keys = [col for col in ['influencer_id', 'campaign', 'product'] if col in tracking.columns]
+    value_cols = [col for col in ['revenue', 'orders'] if col in tracking.columns]
+    # dropna=False keeps rows with a missing product, which an empty product selection retains
+    grouped = tracking.groupby(keys, observed=True, dropna=False)
+    tracking_agg = grouped[value_cols].sum()
+    tracking_agg['records'] = grouped.size()
+    return tracking_agg.reset_index()
+
+
+def select_tracking_agg(campaigns, products):
+    """Rows of the pre-aggregated tracking data matching the selected campaigns and products."""
+    tracking_agg = pre_aggregate_tracking()
+    mask = selection_mask(tracking_agg['campaign'], campaigns)
+    if products:
+        mask &= selection_mask(tracking_agg['product'], products)
+    return tracking_agg[mask]
+
+
+@st.cache_data(max_entries=32)
+def aggregate_tracking(campaigns, products):
+    """Per-influencer tracking totals for the selected campaigns and products."""
+    tracking_agg = select_tracking_agg(campaigns, products)
+    value_cols = [col for col in ['records', 'revenue', 'orders'] if col in tracking_agg.columns]
+    return tracking_agg.groupby('influencer_id')[value_cols].sum()
+
+
+@st.cache_data(max_entries=32)
+def count_campaigns(campaigns, products):
+    """Number of selected campaigns that still have tracking records after the product filter."""
+    return select_tracking_agg(campaigns, products)['campaign'].nunique()
+
+
+@st.cache_data(max_entries=32)
+def build_roas_df(filter_key):
+    """Per-influencer payout, revenue and ROAS for the filtered influencers."""
+    _, _, _, payouts, inf_lookup = load_and_clean_data()
+    _, campaigns, products, *_ = filter_key
+    filtered_influencers, _ = apply_filters(*filter_key)
+
+    # Revenue of the filtered tracking data, from the pre-aggregated totals
+    revenue_df = aggregate_tracking(campaigns, products)[['revenue']].reset_index()
+    revenue_df.rename(columns={'revenue': 'total_revenue'}, inplace=True)
+
+    # Filter payouts to match filtered influencers
+    filtered_influencer_ids = filtered_influencers['id'].to_numpy()
+    present_ids = payouts.index.intersection(filtered_influencer_ids)
+    filtered_payouts = payouts.loc[present_ids]
+
+    # Merge with payouts and name
+    roas_df = filtered_payouts.merge(revenue_df, on='influencer_id', how='left')
+    roas_df['total_revenue'] = roas_df['total_revenue'].fillna(0)
+    roas_df['roas'] = (roas_df['total_revenue'] / roas_df['total_payout']).round(2)
+    roas_df = roas_df.join(inf_lookup[['name']], on='influencer_id')
+    return roas_df
+
+
+def get_roi_payouts(payouts):
+    """Payouts with the payout column normalized to 'total_payout'."""
+    if 'payout_amount' in payouts.columns:
+        return payouts.rename(columns={'payout_amount': 'total_payout'})
+    return payouts
+
+
+@st.cache_data(max_entries=32)
+def build_roi_df(filter_key):
+    """Row-level ROI of filtered tracking records against influencer payouts."""
+    _, _, _, payouts, _ = load_and_clean_data()
+    _, filtered_tracking = apply_filters(*filter_key)
+    payouts_roi = get_roi_payouts(payouts)
+
+    # Merge filtered tracking and payouts
+    roi_df = pd.merge(filtered_tracking, payouts_roi, on='influencer_id', how='inner')
+    roi_df['revenue'] = roi_df['revenue'].fillna(0)
+    roi_df['total_payout'] = roi_df['total_payout'].fillna(0)
+
+    # Calculate ROI (0 where there is no payout)
+    # float64 so downcast int8/int16 columns can't wrap around in the subtraction
+    payout = roi_df['total_payout'].to_numpy(dtype='float64')
+    revenue = roi_df['revenue'].to_numpy(dtype='float64')
+    has_payout = payout != 0
+    roi = np.where(has_payout, (revenue - payout) / np.where(has_payout, payout, 1) * 100, 0.0)
+    roi_df['roi (%)'] = np.round(roi, 2)
+    return roi_df
+
+
+@st.cache_data(max_entries=32)
+def build_incremental_df(filter_key):
+    """Per-influencer orders, revenue, payout and iROAS for the filtered tracking data."""
+    _, _, _, payouts, _ = load_and_clean_data()
+    _, campaigns, products, *_ = filter_key
+    payouts_roi = get_roi_payouts(payouts)
+
+    # --- Step 1: Per-influencer tracking and payout totals ---
+    tracking_totals = aggregate_tracking(campaigns, products)
+    payout_totals = payouts_roi.groupby('influencer_id')['total_payout'].agg(total_payout='sum', payout_rows='size')
+
+    # --- Step 2: Combine, matching a row-level tracking x payouts inner merge ---
+    # That merge repeats every tracking row once per payout row (and vice versa),
+    # so scale each side's totals by the other side's row count.
+    incremental_df = tracking_totals.join(payout_totals, how='inner')
+    incremental_df['orders'] = incremental_df['orders'] * incremental_df['payout_rows']  # Actual tracked orders
+    incremental_df['revenue'] = incremental_df['revenue'] * incremental_df['payout_rows']
+    incremental_df['total_payout'] = incremental_df['total_payout'] * incremental_df['records']
+    incremental_df = incremental_df.reset_index()[['influencer_id', 'orders', 'revenue', 'total_payout']]
+
+    # --- Step 3: Calculate iROAS safely (kept full precision; rounded for display) ---
+    iroas = incremental_df['revenue'] / incremental_df['orders']
+    incremental_df['iROAS'] = iroas.replace([float('inf'), -float('inf')], 0).fillna(0)
+    return incremental_df
+
+
+@st.cache_data(max_entries=32)
+def summarize_filters(filter_key):
+    """Markdown summary of the active filters."""
+    platforms, campaigns, products, categories, genders, follower_range, _ = filter_key
+    return f"""
+**Active Filters Summary:**
+- Platforms: {', '.join(platforms)}
+- Campaigns: {', '.join(campaigns)}
+{f"- Products: {len(products)} selected" if products else "- Products: All products included"}
+{f"- Categories: {', '.join(categories)}" if categories else "- Categories: All categories included"}
+{f"- Genders: {', '.join(genders)}" if genders else "- Genders: All genders included"}
+{f"- Follower Range: {follower_range[0]:,} - {follower_range[1]:,}" if follower_range else "- Followers: Full range included"}
+"""
+
+
+# ===========================
+# 📊 Chart Builders
+# ===========================
+# Vega-Lite specs rendered in the browser, so reruns skip server-side rasterization.
+# Specs are cached as plain dicts, so unchanged chart data skips the Altair build too.
+
+@st.cache_data(max_entries=32)
+def make_roas_chart(chart_data):
+    """Vega-Lite spec for the horizontal ROAS bar chart per influencer, with value labels."""
+    base = alt.Chart(chart_data).encode(
+        x=alt.X('roas:Q', title="ROAS"),
+        y=alt.Y('name:N', title="Influencer", sort='-x'),
+    )
+    bars = base.mark_bar(color='teal')
+    labels = base.mark_text(align='left', baseline='middle', dx=3, fontWeight='bold').encode(
+        text=alt.Text('roas:Q', format='.2f')
+    )
+    chart = (bars + labels).properties(title="ROAS by Influencer (Filtered Results)", height=max(300, 30 * len(chart_data)))
+    return chart.to_dict()
+
+
+@st.cache_data(max_entries=32)
+def make_persona_chart(insights, col):
+    """Vega-Lite spec for the average ROAS bar chart of one persona column, with value labels."""
+    base = alt.Chart(insights).encode(
+        x=alt.X(f'{col}:N', title=col.title(), sort='-y', axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y('avg_roas:Q', title="Average ROAS"),
+    )
+    bars = base.mark_bar(color='steelblue', opacity=0.7)
+    labels = base.mark_text(baseline='bottom', dy=-2).encode(
+        text=alt.Text('avg_roas:Q', format='.2f')
+    )
+    chart = (bars + labels).properties(title=f"Average ROAS by {col.title()} (Filtered)", height=400)
+    return chart.to_dict()
+
+
 try:
-    influencers, posts, tracking, payouts = load_and_clean_data()
+    influencers, posts, tracking, payouts, inf_lookup = load_and_clean_data()
 except Exception as e:
     st.error(f"Failed to load data: {e}")
     st.stop()
@@ -58,16 +353,16 @@ if missing_columns:
 # 1. Platform Filter
 selected_platform = st.sidebar.multiselect(
     "🎯 Platform",
-    options=influencers["platform"].unique(),
-    default=influencers["platform"].unique(),
+    options=influencers["platform"].cat.categories,
+    default=influencers["platform"].cat.categories,
     help="Select social media platforms to analyze"
 )
 
 # 2. Campaign Filter
 selected_campaign = st.sidebar.multiselect(
     "📢 Campaign",
-    options=tracking["campaign"].unique(),
-    default=tracking["campaign"].unique(),
+    options=tracking["campaign"].cat.categories,
+    default=tracking["campaign"].cat.categories,
     help="Choose specific marketing campaigns"
 )
 
@@ -75,8 +370,8 @@ selected_campaign = st.sidebar.multiselect(
 if 'product' in tracking.columns:
     selected_product = st.sidebar.multiselect(
         "🛍️ Product",
-        options=tracking["product"].unique(),
-        default=tracking["product"].unique(),
+        options=tracking["product"].cat.categories,
+        default=tracking["product"].cat.categories,
         help="Filter by specific products"
     )
     product_col = 'product'
@@ -88,8 +383,8 @@ else:
 if 'category' in influencers.columns:
     selected_influencer_type = st.sidebar.multiselect(
         "👤 Influencer Category",
-        options=influencers["category"].unique(),
-        default=influencers["category"].unique(),
+        options=influencers["category"].cat.categories,
+        default=influencers["category"].cat.categories,
         help="Filter by influencer categories (fitness, nutrition, etc.)"
     )
     influencer_type_col = 'category'
@@ -108,8 +403,6 @@ elif 'followers' in influencers.columns:
     follower_col = 'followers'
 
 if follower_col:
-    # Convert to numeric and handle errors
-    influencers[follower_col] = pd.to_numeric(influencers[follower_col], errors='coerce')
     min_followers = int(influencers[follower_col].min()) if not influencers[follower_col].isna().all() else 0
     max_followers = int(influencers[follower_col].max()) if not influencers[follower_col].isna().all() else 1000000
 
@@ -128,24 +421,22 @@ else:
 if 'gender' in influencers.columns:
     selected_gender = st.sidebar.multiselect(
         "⚧ Gender",
-        options=influencers["gender"].unique(),
-        default=influencers["gender"].unique(),
+        options=influencers["gender"].cat.categories,
+        default=influencers["gender"].cat.categories,
         help="Filter by influencer gender"
     )
 else:
     selected_gender = None
 
 # Date Range Filter (if date columns exist)
-date_columns = ['date', 'post_date', 'campaign_date', 'created_at']
 date_col = None
-for col in date_columns:
+for col in DATE_COLUMNS:
     if col in posts.columns:
         date_col = col
         break
 
 if date_col:
     try:
-        posts[date_col] = pd.to_datetime(posts[date_col], errors='coerce')
         min_date = posts[date_col].min().date()
         max_date = posts[date_col].max().date()
 
@@ -171,32 +462,24 @@ if st.sidebar.button("🔄 Reset All Filters"):
 st.sidebar.markdown("---")
 st.sidebar.markdown("**Active Filters:**")
 
-# Start with base data
-filtered_influencers = influencers[influencers["platform"].isin(selected_platform)]
-filtered_tracking = tracking[tracking["campaign"].isin(selected_campaign)]
+filter_key = (
+    to_key(selected_platform),
+    to_key(selected_campaign),
+    to_key(selected_product),
+    to_key(selected_influencer_type) if influencer_type_col else None,
+    to_key(selected_gender),
+    tuple(selected_follower_range) if selected_follower_range else None,
+    follower_col,
+)
+filtered_influencers, filtered_tracking = apply_filters(*filter_key)
 
-# Apply Product Filter
 if selected_product and product_col:
-    filtered_tracking = filtered_tracking[filtered_tracking[product_col].isin(selected_product)]
     st.sidebar.text(f"🛍️ Products: {len(selected_product)}")
-
-# Apply Influencer Type Filter
 if selected_influencer_type and influencer_type_col:
-    filtered_influencers = filtered_influencers[
-        filtered_influencers[influencer_type_col].isin(selected_influencer_type)]
     st.sidebar.text(f"👤 Categories: {len(selected_influencer_type)}")
-
-# Apply Follower Range Filter
 if selected_follower_range and follower_col:
-    filtered_influencers = filtered_influencers[
-        (filtered_influencers[follower_col] >= selected_follower_range[0]) &
-        (filtered_influencers[follower_col] <= selected_follower_range[1])
-        ]
     st.sidebar.text(f"👥 Followers: {selected_follower_range[0]:,} - {selected_follower_range[1]:,}")
-
-# Apply Gender Filter
 if selected_gender:
-    filtered_influencers = filtered_influencers[filtered_influencers["gender"].isin(selected_gender)]
     st.sidebar.text(f"⚧ Genders: {len(selected_gender)}")
 
 # Show filter summary
@@ -212,8 +495,7 @@ col1, col2, col3, col4 = st.columns(4)
 with col1:
     st.metric("Total Influencers", len(filtered_influencers))
 with col2:
-    st.metric("Total Campaigns",
-              len(filtered_tracking['campaign'].unique()) if 'campaign' in filtered_tracking.columns else 0)
+    st.metric("Total Campaigns", count_campaigns(filter_key[1], filter_key[2]))
 with col3:
     st.metric("Total Records", len(filtered_tracking))
 with col4:
@@ -238,8 +520,9 @@ if 'id' not in influencers.columns:
     st.error("'id' column not found in influencers data.")
     st.stop()
 
-# Merge posts with filtered influencers
-merged_posts = posts.merge(filtered_influencers, left_on='influencer_id', right_on='id', how='inner')
+# Keep the filtered influencers' posts (in CSV order), then join their attributes from the prebuilt id lookup
+filtered_posts = posts[posts['influencer_id'].isin(filtered_influencers['id'].to_numpy())]
+merged_posts = filtered_posts.join(inf_lookup, on='influencer_id', how='inner', lsuffix='_x', rsuffix='_y')
 
 # Handle platform ambiguity after merge
 if 'platform_x' in merged_posts.columns and 'platform_y' in merged_posts.columns:
@@ -253,10 +536,10 @@ elif 'platform' not in merged_posts.columns:
 # Apply date filter to posts
 if selected_date_range and date_col and len(selected_date_range) == 2:
     start_date, end_date = selected_date_range
-    merged_posts = merged_posts[
-        (merged_posts[date_col].dt.date >= start_date) &
-        (merged_posts[date_col].dt.date <= end_date)
-        ]
+    start_ts = np.datetime64(start_date)
+    end_ts = np.datetime64(end_date) + np.timedelta64(1, 'D')  # Inclusive of the whole end day
+    post_dates = merged_posts[date_col].to_numpy()
+    merged_posts = merged_posts[(post_dates >= start_ts) & (post_dates < end_ts)]
 
 # Display relevant columns
 display_cols = ['influencer_id', 'platform', 'date', 'url', 'caption', 'reach', 'likes', 'comments']
@@ -288,19 +571,7 @@ try:
             st.error(f"Missing in {src}: {missing}")
             st.stop()
 
-    # Use filtered tracking data
-    revenue_df = filtered_tracking.groupby('influencer_id')['revenue'].sum().reset_index()
-    revenue_df.rename(columns={'revenue': 'total_revenue'}, inplace=True)
-
-    # Filter payouts to match filtered influencers
-    filtered_influencer_ids = filtered_influencers['id'].tolist()
-    filtered_payouts = payouts[payouts['influencer_id'].isin(filtered_influencer_ids)]
-
-    # Merge with payouts and name
-    roas_df = filtered_payouts.merge(revenue_df, on='influencer_id', how='left')
-    roas_df['total_revenue'] = roas_df['total_revenue'].fillna(0)
-    roas_df['roas'] = (roas_df['total_revenue'] / roas_df['total_payout']).round(2)
-    roas_df = roas_df.merge(filtered_influencers[['id', 'name']], left_on='influencer_id', right_on='id', how='left')
+    roas_df = build_roas_df(filter_key)
 
     # Show ROAS table
     roas_display_cols = ['name', 'basis', 'rate', 'orders', 'total_payout', 'total_revenue', 'roas']
@@ -315,20 +586,7 @@ try:
         st.subheader("📊 ROAS Comparison Chart")
         chart_data = roas_df[['name', 'roas']].dropna().sort_values('roas', ascending=False)
         if not chart_data.empty:
-            fig, ax = plt.subplots(figsize=(12, 8))
-            bars = ax.barh(chart_data['name'], chart_data['roas'], color='teal')
-            ax.set_xlabel("ROAS")
-            ax.set_ylabel("Influencer")
-            ax.set_title("ROAS by Influencer (Filtered Results)")
-
-            # Add value labels on bars
-            for bar in bars:
-                width = bar.get_width()
-                ax.text(width, bar.get_y() + bar.get_height() / 2, f'{width:.2f}',
-                ha='left', va='center', fontweight='bold')
-
-            plt.tight_layout()
-            st.pyplot(fig)
+            st.vega_lite_chart(spec=make_roas_chart(chart_data), use_container_width=True)
     else:
         st.warning("No ROAS data matches the selected filters.")
 
@@ -342,25 +600,11 @@ except Exception as e:
 st.subheader("📈 ROI & Campaign Performance")
 
 # Ensure total_payout exists
-payouts_roi = payouts.copy()
-if 'payout_amount' in payouts_roi.columns:
-    payouts_roi.rename(columns={'payout_amount': 'total_payout'}, inplace=True)
-elif 'total_payout' not in payouts_roi.columns:
+if 'payout_amount' not in payouts.columns and 'total_payout' not in payouts.columns:
     st.error("❌ 'total_payout' or 'payout_amount' missing in payouts data.")
     st.stop()
 
-# Merge filtered tracking and payouts
-roi_df = pd.merge(filtered_tracking, payouts_roi, on='influencer_id', how='inner')
-roi_df['revenue'] = pd.to_numeric(roi_df['revenue'], errors='coerce').fillna(0)
-roi_df['total_payout'] = pd.to_numeric(roi_df['total_payout'], errors='coerce').fillna(0)
-
-# Calculate ROI
-roi_df['roi (%)'] = roi_df.apply(
-    lambda row: ((row['revenue'] - row['total_payout']) / row['total_payout']) * 100
-    if row['total_payout'] != 0 else 0,
-    axis=1
-)
-roi_df['roi (%)'] = roi_df['roi (%)'].round(2)
+roi_df = build_roi_df(filter_key)
 
 # Display
 if not roi_df.empty:
@@ -381,73 +625,30 @@ else:
 # 📊 Incremental ROAS - FINAL VERSION (Supports Required Schema)
 st.subheader("📊 Incremental ROAS")
 try:
-    # --- Step 1: Clean column names early ---
-    tracking_clean = filtered_tracking.copy()
-    tracking_clean.columns = tracking_clean.columns.str.strip().str.lower()
-
-    payouts_clean = payouts_roi.copy()
-    payouts_clean.columns = payouts_clean.columns.str.strip().str.lower()
-
-    # --- Step 2: Validate required columns ---
+    # --- Step 1: Validate required columns ---
     required_tracking = ['influencer_id', 'revenue', 'orders']
-    missing_in_tracking = [col for col in required_tracking if col not in tracking_clean.columns]
+    missing_in_tracking = [col for col in required_tracking if col not in tracking.columns]
 
     if missing_in_tracking:
         st.warning(f"⚠️ Missing required columns in tracking data: {', '.join(missing_in_tracking)}")
-        st.info("Available tracking columns: " + ", ".join(tracking_clean.columns.tolist()))
+        st.info("Available tracking columns: " + ", ".join(tracking.columns.tolist()))
     else:
-        # --- Step 3: Merge with suffixes to handle duplicate 'orders' ---
-        merged_df = pd.merge(
-            tracking_clean,
-            payouts_clean,
-            on='influencer_id',
-            how='inner',
-            suffixes=('_tracking', '_payouts')  # Explicitly name conflicts
-        )
+        incremental_df = build_incremental_df(filter_key)
 
-        # --- Step 4: Resolve column names ---
-        # Use 'orders_tracking' as the real customer orders (from tracking)
-        # Rename it to clean 'orders' for clarity
-        if 'orders_tracking' in merged_df.columns:
-            merged_df.rename(columns={'orders_tracking': 'orders'}, inplace=True)
-        elif 'orders_x' in merged_df.columns:
-            merged_df.rename(columns={'orders_x': 'orders'}, inplace=True)
-
-        # Drop the payout-side orders unless needed
-        if 'orders_payouts' in merged_df.columns:
-            merged_df.drop(columns=['orders_payouts'], inplace=True)
-        if 'orders_y' in merged_df.columns:
-            merged_df.drop(columns=['orders_y'], inplace=True)
-
-        # Ensure numeric types
-        merged_df['revenue'] = pd.to_numeric(merged_df['revenue'], errors='coerce').fillna(0)
-        merged_df['orders'] = pd.to_numeric(merged_df['orders'], errors='coerce').fillna(0)
-        merged_df['total_payout'] = pd.to_numeric(merged_df['total_payout'], errors='coerce').fillna(0)
-
-        # --- Step 5: Group by influencer ---
-        incremental_df = merged_df.groupby('influencer_id', as_index=False).agg({
-            'orders': 'sum',  # Sum of actual tracked orders
-            'revenue': 'sum',  # Total revenue
-            'total_payout': 'sum'  # Total payout
-        })
-
-        # --- Step 6: Calculate iROAS safely ---
-        incremental_df['iROAS'] = (incremental_df['revenue'] / incremental_df['orders'])
-        incremental_df['iROAS'] = incremental_df['iROAS'].replace([float('inf'), -float('inf')], 0).fillna(0)
-        incremental_df['iROAS'] = incremental_df['iROAS'].round(2)
-
-        # --- Step 7: Display result ---
+        # --- Step 2: Display result ---
         display_cols = ['influencer_id', 'orders', 'revenue', 'total_payout', 'iROAS']
         if not incremental_df.empty:
-            st.dataframe(incremental_df[display_cols], use_container_width=True, hide_index=True)
+            st.dataframe(
+                incremental_df[display_cols],
+                use_container_width=True,
+                hide_index=True,
+                column_config={'iROAS': st.column_config.NumberColumn(format="%.2f")}
+            )
         else:
             st.warning("No incremental ROAS data matches the selected filters.")
 
 except Exception as e:
     st.error(f"❌ Error calculating incremental ROAS: {str(e)}")
-    if 'merged_df' in locals():
-        st.write("**Columns after merge:**", merged_df.columns.tolist())
-        st.write("**Sample data:**", merged_df.head())
 
 # 📌 Insights – Performance Highlights
 # ===================================
@@ -455,12 +656,12 @@ st.subheader("📌 Insights – Performance Highlights")
 
 try:
     # ⭐ Top Influencers by ROAS
-    top_influencers = roas_df.sort_values('roas', ascending=False).head(5)
+    top_influencers = roas_df.nlargest(5, 'roas')
     st.markdown("### ⭐ Top Influencers (by ROAS)")
     st.dataframe(top_influencers[['name', 'roas', 'total_revenue', 'total_payout']], use_container_width=True)
 
     # 🚩 Poor ROAS Performers
-    poor_roas = roas_df[roas_df['roas'] < 1].sort_values('roas').head(5)
+    poor_roas = roas_df[roas_df['roas'] < 1].nsmallest(5, 'roas')
     st.markdown("### 🚩 Influencers with Poor ROAS (Below 1)")
     st.dataframe(poor_roas[['name', 'roas', 'total_revenue', 'total_payout']], use_container_width=True)
 
@@ -468,20 +669,21 @@ try:
     st.markdown("### 🧠 Persona-Based Insights")
 
     if 'roas' in roas_df.columns and not roas_df.empty:
-        persona_df = roas_df.merge(filtered_influencers, left_on='influencer_id', right_on='id', how='inner')
-
         persona_columns = []
-        if influencer_type_col and influencer_type_col in persona_df.columns:
+        if influencer_type_col and influencer_type_col in inf_lookup.columns:
             persona_columns.append(influencer_type_col)
-        if 'gender' in persona_df.columns:
+        if 'gender' in inf_lookup.columns:
             persona_columns.append('gender')
-        if 'platform' in persona_df.columns:
+        if 'platform' in inf_lookup.columns:
             persona_columns.append('platform')
 
+        # Single join of ROAS onto just the persona attributes
+        persona_df = roas_df[['influencer_id', 'roas']].join(inf_lookup[persona_columns], on='influencer_id', how='inner')
+
         if persona_columns:
             for col in persona_columns:
-                insights = persona_df.groupby(col)['roas'].agg(['mean', 'count']).reset_index()
-                insights.columns = [col, 'avg_roas', 'count']
+                roas_by_col = persona_df.groupby(col, observed=True)['roas']
+                insights = roas_by_col.agg(avg_roas='mean', count='count').reset_index()
                 insights = insights.sort_values('avg_roas', ascending=False)
 
                 st.write(f"**Average ROAS by {col.title()}:**")
@@ -489,20 +691,7 @@ try:
 
                 with col1:
                     if not insights.empty:
-                        fig, ax = plt.subplots(figsize=(10, 6))
-                        bars = ax.bar(insights[col], insights['avg_roas'], color='steelblue', alpha=0.7)
-                        ax.set_xlabel(col.title())
-                        ax.set_ylabel("Average ROAS")
-                        ax.set_title(f"Average ROAS by {col.title()} (Filtered)")
-                        plt.xticks(rotation=45)
-
-                        for bar in bars:
-                            height = bar.get_height()
-                            ax.text(bar.get_x() + bar.get_width() / 2., height,
-                                    f'{height:.2f}', ha='center', va='bottom')
-
-                        plt.tight_layout()
-                        st.pyplot(fig)
+                        st.vega_lite_chart(spec=make_persona_chart(insights, col), use_container_width=True)
 
                 with col2:
                     st.dataframe(insights, use_container_width=True, hide_index=True)
@@ -537,14 +726,6 @@ with col4:
     st.metric("Revenue per Influencer", f"₹{efficiency:,.2f}")
 
 # Show active filters summary
-st.info(f"""
-**Active Filters Summary:**
-- Platforms: {', '.join(selected_platform)}
-- Campaigns: {', '.join(selected_campaign)}
-{f"- Products: {len(selected_product)} selected" if selected_product else "- Products: All products included"}
-{f"- Categories: {', '.join(selected_influencer_type)}" if selected_influencer_type else "- Categories: All categories included"}
-{f"- Genders: {', '.join(selected_gender)}" if selected_gender else "- Genders: All genders included"}
-{f"- Follower Range: {selected_follower_range[0]:,} - {selected_follower_range[1]:,}" if selected_follower_range else "- Followers: Full range included"}
-""")
+st.info(summarize_filters(filter_key))
 st.markdown("---")
 st.markdown("*Use the sidebar filters to drill down into specific segments and discover insights!*")
\ No newline at end of file
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = Path(__file__).resolve().parents[1] / "healthkart_dashboard" / "app.py"
+
+# One missing value in every filter column: platform, category, gender (influencers)
+# and campaign, product (tracking).
+INFLUENCERS_CSV = """ID,name,category,gender,follower_count,platform
+1,AaravFit,Fitness,Male,350000,Instagram
+2,NehaNutrition,,Female,280000,YouTube
+3,RohanRuns,Nutrition,,150000,
+"""
+POSTS_CSV = """influencer_id,platform,date,URL,caption,reach,likes,comments
+1,Instagram,2024-01-10,https://insta.com/aarav1,"Post-workout energy boost!",55000,4300,310
+2,YouTube,2024-01-12,https://yt.com/neha1,"My daily vitamin routine",68000,5000,420
+3,Instagram,2024-01-14,https://insta.com/rohan1,"Morning run fuel",30000,2100,150
+"""
+TRACKING_CSV = """source,campaign,influencer_id,user_id,product,date,orders,revenue
+Instagram,MB2024,1,1001,Whey Protein,2024-01-11,3,1500
+YouTube,,2,1002,Vitamins,2024-01-13,2,1100
+Instagram,MB2024,3,1003,,2024-01-15,8,40000
+"""
+PAYOUTS_CSV = """influencer_id,basis,rate,orders,total_payout
+1,post,1000,5,1000
+2,order,400,5,2000
+3,post,1500,2,1500
+"""
+
+
+def run_app(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "influencers.csv").write_text(INFLUENCERS_CSV)
+    (data_dir / "posts.csv").write_text(POSTS_CSV)
+    (data_dir / "tracking_data.csv").write_text(TRACKING_CSV)
+    (data_dir / "payouts.csv").write_text(PAYOUTS_CSV)
+    monkeypatch.chdir(tmp_path)
+    return AppTest.from_file(str(APP_PATH)).run(timeout=30)
+
+
+def test_default_filters_keep_rows_with_missing_values(tmp_path, monkeypatch):
+    at = run_app(tmp_path, monkeypatch)
+    assert not at.exception
+
+    metrics = {metric.label: metric.value for metric in at.metric}
+    assert metrics["Total Influencers"] == "3"
+    assert metrics["Total Records"] == "3"
+    assert metrics["Total Revenue"] == "₹42,600.00"
+
+    incremental = next(df.value for df in at.dataframe if 'iROAS' in df.value.columns)
+    assert sorted(incremental['influencer_id']) == [1, 2, 3]
+    assert incremental['revenue'].sum() == 42600